@@ -1,5 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, null, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from app import models, schemas
+from app.utils.scoring import higher_is_better
 import uuid
 from datetime import datetime
 
@@ -34,6 +37,16 @@ def get_competition(db: Session, competition_id: str):
 def get_competitions(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Competition).offset(skip).limit(limit).all()
 
+# Column tuples for list endpoints, serialized without building ORM objects or Pydantic models
+COMPETITION_LIST_FIELDS = (
+    "title", "description", "deadline", "metric", "id", "trainDataPath", "solutionDataPath",
+    "publicFraction", "createdAt", "updatedAt",
+)
+
+def get_competition_rows(db: Session, skip: int = 0, limit: int = 100):
+    columns = [getattr(models.Competition, f) for f in COMPETITION_LIST_FIELDS]
+    return db.query(*columns).offset(skip).limit(limit).all()
+
 def create_competition(db: Session, competition: schemas.CompetitionCreate, train_path: str, solution_path: str):
     # Ensure deadline is stored as ISO string with Z
     deadline_iso = competition.deadline.isoformat()
@@ -65,11 +78,234 @@ def create_submission(db: Session, submission: schemas.SubmissionCreate):
     db_submission = models.Submission(
         id=str(uuid.uuid4()),
         score=submission.score,
+        publicScore=submission.publicScore,
+        privateScore=submission.privateScore,
         filePath=submission.filePath,
         userId=submission.userId,
         competitionId=submission.competitionId
     )
     db.add(db_submission)
+    update_stats_for_submission(db, db_submission)
     db.commit()
     db.refresh(db_submission)
     return db_submission
+
+# Aggregate Operations
+def _is_better(metric: str, score: float, best) -> bool:
+    if best is None:
+        return True
+    return score > best if higher_is_better(metric) else score < best
+
+def _insert_missing(db: Session, model, **values) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING on the primary key; returns True if this call created the row."""
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    primary_key = [column.name for column in model.__table__.primary_key]
+    return db.execute(insert(model).values(**values).on_conflict_do_nothing(index_elements=primary_key)).rowcount == 1
+
+def _add_submission(db: Session, model, where: list, created_at: str, **increments):
+    """Bumps counters and lastSubmissionAt in SQL, so concurrent submissions don't overwrite each other."""
+    values = {name: getattr(model, name) + amount for name, amount in increments.items()}
+    values["lastSubmissionAt"] = case(
+        (or_(model.lastSubmissionAt.is_(None), model.lastSubmissionAt < created_at), created_at),
+        else_=model.lastSubmissionAt,
+    )
+    db.execute(update(model).where(*where).values(**values).execution_options(synchronize_session=False))
+
+def _improve_best(db: Session, model, where: list, column: str, score: float, metric: str) -> bool:
+    """Sets column to score if it beats the stored value; returns True if it did."""
+    best = getattr(model, column)
+    beaten = best < score if higher_is_better(metric) else best > score
+    result = db.execute(
+        update(model).where(*where, or_(best.is_(None), beaten)).values({column: score}).execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+def update_stats_for_submission(db: Session, submission: models.Submission):
+    """
+    Folds one new submission into the user/competition rollups.
+    Runs in the caller's transaction. Rows are created with insert-or-ignore and counters are
+    incremented in SQL, so concurrent workers neither lose updates nor collide on first inserts.
+    Ranks are only recomputed when one of the user's best scores changes.
+    """
+    competition = get_competition(db, submission.competitionId)
+    metric = competition.metric if competition else "ACCURACY"
+    created_at = submission.createdAt or models.get_iso_now()
+    submission.createdAt = created_at
+
+    UCS = models.UserCompetitionStats
+    user_where = [models.UserStats.userId == submission.userId]
+    competition_where = [models.CompetitionStats.competitionId == submission.competitionId]
+    entry_where = [UCS.userId == submission.userId, UCS.competitionId == submission.competitionId]
+
+    _insert_missing(db, models.UserStats, userId=submission.userId, submissionCount=0, competitionCount=0)
+    _insert_missing(db, models.CompetitionStats, competitionId=submission.competitionId, submissionCount=0, participantCount=0)
+    first_in_competition = _insert_missing(db, UCS, userId=submission.userId, competitionId=submission.competitionId, submissionCount=0)
+
+    new_participant = 1 if first_in_competition else 0
+    _add_submission(db, models.UserStats, user_where, created_at, submissionCount=1, competitionCount=new_participant)
+    _add_submission(db, models.CompetitionStats, competition_where, created_at, submissionCount=1, participantCount=new_participant)
+    _add_submission(db, UCS, entry_where, created_at, submissionCount=1)
+
+    # Legacy submissions only have 'score', which covered every row
+    public_score = submission.publicScore if submission.publicScore is not None else submission.score
+    private_score = submission.privateScore if submission.privateScore is not None else submission.score
+
+    improved = False
+    if public_score is not None:
+        _improve_best(db, models.CompetitionStats, competition_where, "bestPublicScore", public_score, metric)
+        improved |= _improve_best(db, UCS, entry_where, "bestPublicScore", public_score, metric)
+    if private_score is not None:
+        _improve_best(db, models.CompetitionStats, competition_where, "bestPrivateScore", private_score, metric)
+        improved |= _improve_best(db, UCS, entry_where, "bestPrivateScore", private_score, metric)
+    if improved:
+        recompute_competition_ranks(db, submission.competitionId, metric)
+
+def _assign_ranks(entries: list, score_attr: str, rank_attr: str, metric: str):
+    ranked = [e for e in entries if getattr(e, score_attr) is not None]
+    ranked.sort(key=lambda e: getattr(e, score_attr), reverse=higher_is_better(metric))
+
+    rank, previous = 0, None
+    for position, entry in enumerate(ranked, start=1):
+        if getattr(entry, score_attr) != previous:
+            rank, previous = position, getattr(entry, score_attr)
+        setattr(entry, rank_attr, rank)
+
+def recompute_competition_ranks(db: Session, competition_id: str, metric: str):
+    """Standard competition ranking (1, 2, 2, 4) over each user's best public and best private score."""
+    # populate_existing: best scores may have just been changed in SQL behind the session's back
+    entries = db.query(models.UserCompetitionStats).populate_existing().filter(models.UserCompetitionStats.competitionId == competition_id).all()
+    _assign_ranks(entries, "bestPublicScore", "publicRank", metric)
+    _assign_ranks(entries, "bestPrivateScore", "privateRank", metric)
+
+def get_user_stats(db: Session, user_id: str):
+    # Single query: the user's rollup joined with all of their per-competition rollups
+    return db.query(models.UserStats).options(joinedload(models.UserStats.competitions)).filter(models.UserStats.userId == user_id).first()
+
+USER_STATS_LIST_FIELDS = ("userId", "submissionCount", "competitionCount", "lastSubmissionAt")
+
+def get_user_stats_rows(db: Session, skip: int = 0, limit: int = 100):
+    columns = [getattr(models.UserStats, f) for f in USER_STATS_LIST_FIELDS]
+    return db.query(*columns).order_by(models.UserStats.submissionCount.desc()).offset(skip).limit(limit).all()
+
+def get_competition_stats(db: Session, competition_id: str):
+    return db.get(models.CompetitionStats, competition_id)
+
+def get_competition_deadlines(db: Session, competition_ids) -> dict:
+    return dict(db.query(models.Competition.id, models.Competition.deadline).filter(models.Competition.id.in_(list(competition_ids))).all())
+
+LEADERBOARD_FIELDS = ("userId", "competitionId", "submissionCount", "bestPublicScore", "bestPrivateScore", "lastSubmissionAt", "rank")
+
+def get_competition_leaderboard_rows(db: Session, competition_id: str, reveal_private: bool, skip: int = 0, limit: int = 100):
+    """
+    Ranked on the private score once reveal_private is set (the deadline has passed), on the
+    public score before that, with the private score left out of the rows entirely.
+    """
+    UCS = models.UserCompetitionStats
+    rank = UCS.privateRank if reveal_private else UCS.publicRank
+    columns = [
+        UCS.userId, UCS.competitionId, UCS.submissionCount, UCS.bestPublicScore,
+        UCS.bestPrivateScore if reveal_private else null().label("bestPrivateScore"),
+        UCS.lastSubmissionAt, rank.label("rank"),
+    ]
+    return db.query(*columns).filter(
+        UCS.competitionId == competition_id
+    ).order_by(rank.is_(None), rank).offset(skip).limit(limit).all()
+
+def _recompute_user_stats(db: Session, user_ids: list):
+    """Re-derives the given users' rollups from their remaining per-competition rollups."""
+    UCS = models.UserCompetitionStats
+    totals = {
+        user_id: (count, competitions, last_at)
+        for user_id, count, competitions, last_at in db.query(
+            UCS.userId, func.sum(UCS.submissionCount), func.count(UCS.competitionId), func.max(UCS.lastSubmissionAt)
+        ).filter(UCS.userId.in_(user_ids)).group_by(UCS.userId).all()
+    }
+    for user_id in user_ids:
+        user_stats = db.get(models.UserStats, user_id)
+        if user_stats is None:
+            continue
+        if user_id not in totals:
+            db.delete(user_stats)
+            continue
+        user_stats.submissionCount, user_stats.competitionCount, user_stats.lastSubmissionAt = totals[user_id]
+
+def delete_competition_stats(db: Session, competition_id: str):
+    UCS = models.UserCompetitionStats
+    user_ids = [user_id for user_id, in db.query(UCS.userId).filter(UCS.competitionId == competition_id).all()]
+    db.query(UCS).filter(UCS.competitionId == competition_id).delete()
+    db.query(models.CompetitionStats).filter(models.CompetitionStats.competitionId == competition_id).delete()
+    _recompute_user_stats(db, user_ids)
+
+def _build_competition_rollups(db: Session, competition_id: str = None) -> list:
+    """
+    Adds UserCompetitionStats and CompetitionStats rows computed from the Submission table
+    (for one competition, or all of them) and ranks them. Returns the per user+competition
+    aggregates as (userId, competitionId, count, lastSubmissionAt).
+    """
+    metrics = dict(db.query(models.Competition.id, models.Competition.metric).all())
+    S = models.Submission
+    # Legacy submissions only have 'score', which covered every row
+    public_score = func.coalesce(S.publicScore, S.score)
+    private_score = func.coalesce(S.privateScore, S.score)
+    # Submissions of deleted competitions are left behind with a NULL competitionId; the join skips them
+    query = db.query(
+        S.userId, S.competitionId, func.count(S.id),
+        func.max(public_score), func.min(public_score), func.max(private_score), func.min(private_score),
+        func.max(S.createdAt)
+    ).join(models.Competition, models.Competition.id == S.competitionId)
+    if competition_id is not None:
+        query = query.filter(S.competitionId == competition_id)
+    rows = query.group_by(S.userId, S.competitionId).all()
+
+    competition_stats = {}
+    for user_id, competition_id, count, max_public, min_public, max_private, min_private, last_at in rows:
+        metric = metrics.get(competition_id, "ACCURACY")
+        best_public, best_private = (max_public, max_private) if higher_is_better(metric) else (min_public, min_private)
+        db.add(models.UserCompetitionStats(
+            userId=user_id, competitionId=competition_id, submissionCount=count,
+            bestPublicScore=best_public, bestPrivateScore=best_private, lastSubmissionAt=last_at
+        ))
+
+        c = competition_stats.setdefault(competition_id, models.CompetitionStats(competitionId=competition_id, submissionCount=0, participantCount=0))
+        c.submissionCount += count
+        c.participantCount += 1
+        c.lastSubmissionAt = max(filter(None, [c.lastSubmissionAt, last_at]), default=None)
+        if best_public is not None and _is_better(metric, best_public, c.bestPublicScore):
+            c.bestPublicScore = best_public
+        if best_private is not None and _is_better(metric, best_private, c.bestPrivateScore):
+            c.bestPrivateScore = best_private
+
+    db.add_all(list(competition_stats.values()))
+    db.flush()
+    for competition_id in competition_stats:
+        recompute_competition_ranks(db, competition_id, metrics.get(competition_id, "ACCURACY"))
+    return [(user_id, competition_id, count, last_at) for user_id, competition_id, count, *_, last_at in rows]
+
+def rebuild_competition_stats(db: Session, competition_id: str):
+    """
+    Recomputes one competition's rollups, e.g. after its metric (and with it the direction
+    of 'best') changed. User totals don't depend on the metric and are left alone.
+    Runs in the caller's transaction.
+    """
+    db.query(models.UserCompetitionStats).filter(models.UserCompetitionStats.competitionId == competition_id).delete()
+    db.query(models.CompetitionStats).filter(models.CompetitionStats.competitionId == competition_id).delete()
+    _build_competition_rollups(db, competition_id)
+
+def rebuild_stats(db: Session):
+    """
+    Recomputes every rollup from the Submission table.
+    Only needed once for data that predates the aggregates, or to repair drift.
+    """
+    db.query(models.UserCompetitionStats).delete()
+    db.query(models.UserStats).delete()
+    db.query(models.CompetitionStats).delete()
+
+    user_stats = {}
+    for user_id, competition_id, count, last_at in _build_competition_rollups(db):
+        u = user_stats.setdefault(user_id, models.UserStats(userId=user_id, submissionCount=0, competitionCount=0))
+        u.submissionCount += count
+        u.competitionCount += 1
+        u.lastSubmissionAt = max(filter(None, [u.lastSubmissionAt, last_at]), default=None)
+
+    db.add_all(list(user_stats.values()))
+    db.commit()
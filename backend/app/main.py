@@ -1,6 +1,8 @@
-from fastapi import FastAPI
-from app.routers import submissions, competitions
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.routers import submissions, competitions, stats, admin
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.rate_limit import submission_limiter, RateLimitExceeded
 from app.database import engine
 from app import models
 
@@ -22,8 +24,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def submission_admission(request: Request, call_next):
+    # Runs before the upload body is read, so refused submissions cost almost nothing.
+    # X-User-Id isn't authenticated, so it is only used to peek at that user's bucket;
+    # the token itself is spent by the route for the form's user_id.
+    if request.method == "POST" and request.url.path.rstrip("/").endswith("/submissions"):
+        user_id = request.headers.get("x-user-id")
+        try:
+            submission_limiter.check_admission()
+            if user_id:
+                submission_limiter.peek_rate(user_id)
+        except RateLimitExceeded as e:
+            return JSONResponse(status_code=429, content={"detail": e.detail}, headers={"Retry-After": str(e.retry_after)})
+    return await call_next(request)
+
 app.include_router(submissions.router)
 app.include_router(competitions.router)
+app.include_router(stats.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Enum, LargeBinary, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -41,6 +41,9 @@ class Competition(Base):
     metric = Column(String) # Enum storage as string
     trainDataPath = Column(String)
     solutionDataPath = Column(String)
+    publicFraction = Column(Float, default=0.3) # Share of solution rows on the public leaderboard
+    publicRowMask = Column(LargeBinary, nullable=True) # Packed bitmap over solution rows (1 = public)
+    solutionSchema = Column(JSON, nullable=True) # Columns, dtypes and ID strategy inferred from the solution file
     createdAt = Column(String, default=get_iso_now)
     updatedAt = Column(String, default=get_iso_now, onupdate=get_iso_now)
 
@@ -49,7 +52,9 @@ class Competition(Base):
 class Submission(Base):
     __tablename__ = "Submission"
     id = Column(String, primary_key=True)
-    score = Column(Float)
+    score = Column(Float) # Public leaderboard score (public rows only), safe to show before the deadline
+    publicScore = Column(Float, nullable=True)
+    privateScore = Column(Float, nullable=True) # Final leaderboard score, only revealed after the deadline
     filePath = Column(String)
     createdAt = Column(String, default=get_iso_now)
     
@@ -58,3 +63,37 @@ class Submission(Base):
     
     user = relationship("User", back_populates="submissions")
     competition = relationship("Competition", back_populates="submissions")
+
+# Aggregates, maintained incrementally on each submission insert (see crud.update_stats_for_submission)
+class UserStats(Base):
+    __tablename__ = "UserStats"
+    userId = Column(String, ForeignKey("User.id"), primary_key=True)
+    submissionCount = Column(Integer, default=0)
+    competitionCount = Column(Integer, default=0)
+    lastSubmissionAt = Column(String, nullable=True)
+
+    competitions = relationship(
+        "UserCompetitionStats",
+        primaryjoin="UserStats.userId == foreign(UserCompetitionStats.userId)",
+        viewonly=True,
+    )
+
+class UserCompetitionStats(Base):
+    __tablename__ = "UserCompetitionStats"
+    userId = Column(String, ForeignKey("User.id"), primary_key=True)
+    competitionId = Column(String, ForeignKey("Competition.id"), primary_key=True, index=True)
+    submissionCount = Column(Integer, default=0)
+    bestPublicScore = Column(Float, nullable=True)
+    bestPrivateScore = Column(Float, nullable=True) # Only exposed after the competition's deadline, like privateRank
+    lastSubmissionAt = Column(String, nullable=True)
+    publicRank = Column(Integer, nullable=True)
+    privateRank = Column(Integer, nullable=True)
+
+class CompetitionStats(Base):
+    __tablename__ = "CompetitionStats"
+    competitionId = Column(String, ForeignKey("Competition.id"), primary_key=True)
+    submissionCount = Column(Integer, default=0)
+    participantCount = Column(Integer, default=0)
+    bestPublicScore = Column(Float, nullable=True)
+    bestPrivateScore = Column(Float, nullable=True)
+    lastSubmissionAt = Column(String, nullable=True)
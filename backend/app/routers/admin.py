@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Header
+from app.utils.scheduler import scoring_scheduler
+from app.utils.rate_limit import submission_limiter
+import os
+import secrets
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+def require_admin(x_admin_token: str = Header(None)):
+    """
+    Admin routes need the ADMIN_TOKEN secret in the X-Admin-Token header; they are disabled
+    while it isn't set. User IDs are public and X-User-Id isn't authenticated, so neither counts.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+@router.get("/scoring-queue", dependencies=[Depends(require_admin)])
+async def read_scoring_queue():
+    return {
+        **scoring_scheduler.snapshot(),
+        "backlog": submission_limiter.scoring_backlog,
+        "maxBacklog": submission_limiter.max_scoring_backlog,
+    }
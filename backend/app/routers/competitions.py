@@ -1,9 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 import uuid
 from app import crud, schemas, models
+from app.utils.scoring import build_public_mask, infer_solution_schema, DEFAULT_PUBLIC_FRACTION
+from app.utils.serialization import rows_to_json, etag_response
 import os
 from datetime import datetime
 import shutil
@@ -20,9 +22,10 @@ os.makedirs(TRAIN_DIR, exist_ok=True)
 os.makedirs(SOLUTION_DIR, exist_ok=True)
 
 @router.get("/", response_model=list[schemas.Competition])
-async def read_competitions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    competitions = crud.get_competitions(db, skip=skip, limit=limit)
-    return competitions
+async def read_competitions(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    rows = crud.get_competition_rows(db, skip=skip, limit=limit)
+    body = rows_to_json(crud.COMPETITION_LIST_FIELDS, rows, timestamp_fields=("deadline", "createdAt", "updatedAt"))
+    return etag_response(request, body)
 
 @router.post("/", response_model=schemas.Competition)
 async def create_competition(
@@ -32,8 +35,12 @@ async def create_competition(
     metric: str = Form(...),
     train_file: UploadFile = File(...),
     solution_file: UploadFile = File(...),
+    public_fraction: float = Form(DEFAULT_PUBLIC_FRACTION),
     db: Session = Depends(get_db)
 ):
+    if not 0 < public_fraction < 1:
+        raise HTTPException(status_code=400, detail="public_fraction must be between 0 and 1")
+
     try:
         # Save files
         file_id = str(uuid.uuid4())
@@ -49,6 +56,10 @@ async def create_competition(
         
         with open(solution_path, "wb") as buffer:
             shutil.copyfileobj(solution_file.file, buffer)
+
+        # Split solution rows into public/private leaderboards and infer the scoring schema once, up front
+        public_row_mask = build_public_mask(solution_path, public_fraction)
+        solution_schema = infer_solution_schema(solution_path)
             
         # Parse deadline
         deadline_dt = datetime.fromisoformat(deadline)
@@ -60,7 +71,10 @@ async def create_competition(
             deadline=deadline_dt,
             metric=metric,
             trainDataPath=train_path,
-            solutionDataPath=solution_path
+            solutionDataPath=solution_path,
+            publicFraction=public_fraction,
+            publicRowMask=public_row_mask,
+            solutionSchema=solution_schema
         )
         
         db.add(db_competition)
@@ -98,6 +112,7 @@ async def delete_competition(competition_id: str, db: Session = Depends(get_db))
         os.remove(competition.solutionDataPath)
         
     # Delete from DB
+    crud.delete_competition_stats(db, competition_id)
     db.delete(competition)
     db.commit()
     
@@ -126,8 +141,11 @@ async def update_competition(
             competition.description = description
         if deadline:
             competition.deadline = datetime.fromisoformat(deadline)
-        if metric:
+        if metric and metric != competition.metric:
             competition.metric = metric
+            # Best scores and ranks were computed in the old metric's direction
+            db.flush()
+            crud.rebuild_competition_stats(db, competition_id)
             
         # Update files if provided
         if train_file:
@@ -155,6 +173,8 @@ async def update_competition(
             with open(solution_path, "wb") as buffer:
                 shutil.copyfileobj(solution_file.file, buffer)
             competition.solutionDataPath = solution_path
+            competition.publicRowMask = build_public_mask(solution_path, competition.publicFraction or DEFAULT_PUBLIC_FRACTION)
+            competition.solutionSchema = infer_solution_schema(solution_path)
             
         db.commit()
         db.refresh(competition)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import crud, schemas
+from app.routers.admin import require_admin
+from app.utils.deadlines import is_past_deadline
+from app.utils.serialization import rows_to_json, etag_response
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+@router.get("/users", response_model=list[schemas.UserStats])
+async def read_user_stats_list(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    rows = crud.get_user_stats_rows(db, skip=skip, limit=limit)
+    return etag_response(request, rows_to_json(crud.USER_STATS_LIST_FIELDS, rows, timestamp_fields=("lastSubmissionAt",)))
+
+@router.get("/users/{user_id}", response_model=schemas.UserProfileStats)
+async def read_user_stats(user_id: str, db: Session = Depends(get_db)):
+    stats = crud.get_user_stats(db, user_id)
+    if not stats:
+        if not crud.get_user(db, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        # Known user without submissions yet
+        return schemas.UserProfileStats(userId=user_id, submissionCount=0, competitionCount=0)
+
+    # Private scores and ranks only show up for competitions whose deadline has passed
+    deadlines = crud.get_competition_deadlines(db, [c.competitionId for c in stats.competitions])
+    competitions = []
+    for c in stats.competitions:
+        revealed = is_past_deadline(deadlines.get(c.competitionId))
+        competitions.append(schemas.UserCompetitionStats(
+            userId=c.userId,
+            competitionId=c.competitionId,
+            submissionCount=c.submissionCount,
+            bestPublicScore=c.bestPublicScore,
+            bestPrivateScore=c.bestPrivateScore if revealed else None,
+            lastSubmissionAt=c.lastSubmissionAt,
+            rank=c.privateRank if revealed else c.publicRank,
+        ))
+
+    ranks = [c.rank for c in competitions if c.rank is not None]
+    return schemas.UserProfileStats(
+        userId=stats.userId,
+        submissionCount=stats.submissionCount,
+        competitionCount=stats.competitionCount,
+        lastSubmissionAt=stats.lastSubmissionAt,
+        bestRank=min(ranks) if ranks else None,
+        competitions=competitions,
+    )
+
+@router.get("/competitions/{competition_id}", response_model=schemas.CompetitionStats)
+async def read_competition_stats(competition_id: str, db: Session = Depends(get_db)):
+    competition = crud.get_competition(db, competition_id)
+    if not competition:
+        raise HTTPException(status_code=404, detail="Competition not found")
+    stats = crud.get_competition_stats(db, competition_id)
+    if not stats:
+        return schemas.CompetitionStats(competitionId=competition_id, submissionCount=0, participantCount=0)
+
+    response = schemas.CompetitionStats.model_validate(stats)
+    if not is_past_deadline(competition.deadline):
+        response.bestPrivateScore = None
+    return response
+
+@router.get("/competitions/{competition_id}/leaderboard", response_model=list[schemas.UserCompetitionStats])
+async def read_competition_leaderboard(request: Request, competition_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    competition = crud.get_competition(db, competition_id)
+    reveal_private = competition is not None and is_past_deadline(competition.deadline)
+    rows = crud.get_competition_leaderboard_rows(db, competition_id, reveal_private, skip=skip, limit=limit)
+    return etag_response(request, rows_to_json(crud.LEADERBOARD_FIELDS, rows, timestamp_fields=("lastSubmissionAt",)))
+
+@router.post("/rebuild", status_code=204, dependencies=[Depends(require_admin)])
+async def rebuild_stats(db: Session = Depends(get_db)):
+    crud.rebuild_stats(db)
+    return None
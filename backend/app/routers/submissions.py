@@ -1,7 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.utils.scoring import calculate_score
+from app.utils.scoring import calculate_score, calculate_archive_score, infer_solution_schema, build_public_mask, is_archive, ARCHIVE_EXTENSIONS, DEFAULT_PUBLIC_FRACTION
+from app.utils.deadlines import is_past_deadline
+from app.utils.rate_limit import submission_limiter, RateLimitExceeded
+from app.utils.scheduler import scoring_scheduler
 from app import crud, schemas
 import os
 from datetime import datetime
@@ -15,6 +18,9 @@ router = APIRouter(
 UPLOAD_DIR = "uploads/submissions"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def _too_many_requests(e: RateLimitExceeded) -> HTTPException:
+    return HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
 @router.post("/", response_model=schemas.Submission)
 async def create_submission(
     file: UploadFile = File(...),
@@ -32,13 +38,41 @@ async def create_submission(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    # Rate limit and daily quotas, before anything is saved. The middleware only peeked at the
+    # X-User-Id header's bucket; the token is spent here, for the user_id actually submitting.
+    # The quota is reserved now and given back below if the submission doesn't go through.
+    try:
+        submission_limiter.check_rate(user_id)
+        submission_limiter.reserve_quota(user_id, competition_id)
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
+
+    try:
+        db_submission = await _save_and_score(db, competition, file, user_id)
+    except BaseException:
+        submission_limiter.release_quota(user_id, competition_id)
+        raise
+
+    # 'score' only covers public rows; private scores are stored right away but only revealed after the deadline
+    response = schemas.Submission.model_validate(db_submission)
+    if not is_past_deadline(competition.deadline):
+        response.privateScore = None
+    return response
+
+async def _save_and_score(db: Session, competition, file: UploadFile, user_id: str):
+    competition_id = competition.id
+
     # 3. Save uploaded file
-    file_ext = file.filename.split(".")[-1]
-    if file_ext.lower() != "csv":
-        raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+    # A single CSV, or an archive of CSV shards (e.g. one per video)
+    if is_archive(file.filename):
+        file_ext = next(ext for ext in ARCHIVE_EXTENSIONS if file.filename.lower().endswith(ext))
+    elif file.filename.lower().endswith(".csv"):
+        file_ext = ".csv"
+    else:
+        raise HTTPException(status_code=400, detail=f"Only CSV files or {', '.join(ARCHIVE_EXTENSIONS)} archives of CSV files are allowed")
     
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"{user_id}_{timestamp}.csv"
+    filename = f"{user_id}_{timestamp}{file_ext}"
     competition_upload_dir = os.path.join(UPLOAD_DIR, competition_id)
     os.makedirs(competition_upload_dir, exist_ok=True)
     file_path = os.path.join(competition_upload_dir, filename)
@@ -57,7 +91,22 @@ async def create_submission(
              if not os.path.exists(solution_path):
                 raise HTTPException(status_code=500, detail=f"Solution file not found at {competition.solutionDataPath}")
 
-        score = calculate_score(file_path, solution_path, competition.metric)
+        # Competitions created before schemas and public/private splits were cached get them once here
+        if competition.solutionSchema is None or competition.publicRowMask is None:
+            if competition.solutionSchema is None:
+                competition.solutionSchema = infer_solution_schema(solution_path)
+            if competition.publicRowMask is None:
+                competition.publicFraction = competition.publicFraction or DEFAULT_PUBLIC_FRACTION
+                competition.publicRowMask = build_public_mask(solution_path, competition.publicFraction)
+            db.commit()
+
+        # Queued behind other pending scoring jobs by deadline, size and per-user fairness
+        with submission_limiter.scoring_slot():
+            scorer = calculate_archive_score if is_archive(file_path) else calculate_score
+            scores = await scoring_scheduler.run(
+                scorer, file_path, solution_path, competition.metric, competition.publicRowMask, competition.solutionSchema,
+                user_id=user_id, competition_id=competition_id, deadline=competition.deadline, file_path=file_path
+            )
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -66,7 +115,7 @@ async def create_submission(
 
     # 5. Save submission to DB
     submission_data = schemas.SubmissionCreate(
-        score=score,
+        **scores,
         filePath=file_path,
         userId=user_id,
         competitionId=competition_id
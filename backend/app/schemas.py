@@ -40,6 +40,7 @@ class Competition(CompetitionBase):
     id: str
     trainDataPath: str
     solutionDataPath: str
+    publicFraction: Optional[float] = None
     createdAt: datetime
     updatedAt: datetime
 
@@ -47,8 +48,10 @@ class Competition(CompetitionBase):
         from_attributes = True
 
 class SubmissionBase(BaseModel):
-    score: float
+    score: float # Public leaderboard score; the private one is only returned after the deadline
     filePath: str
+    publicScore: Optional[float] = None
+    privateScore: Optional[float] = None
 
 class SubmissionCreate(SubmissionBase):
     userId: str
@@ -62,3 +65,40 @@ class Submission(SubmissionBase):
 
     class Config:
         from_attributes = True
+
+class UserCompetitionStats(BaseModel):
+    userId: str
+    competitionId: str
+    submissionCount: int
+    bestPublicScore: Optional[float] = None
+    # Private score and ranking stay hidden until the deadline; 'rank' is on the public score until then
+    bestPrivateScore: Optional[float] = None
+    lastSubmissionAt: Optional[datetime] = None
+    rank: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class UserStats(BaseModel):
+    userId: str
+    submissionCount: int
+    competitionCount: int
+    lastSubmissionAt: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class UserProfileStats(UserStats):
+    bestRank: Optional[int] = None
+    competitions: List[UserCompetitionStats] = []
+
+class CompetitionStats(BaseModel):
+    competitionId: str
+    submissionCount: int
+    participantCount: int
+    bestPublicScore: Optional[float] = None
+    bestPrivateScore: Optional[float] = None
+    lastSubmissionAt: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+def parse_deadline(value: Union[str, datetime]) -> datetime:
+    """
+    Normalizes a stored deadline to a naive UTC datetime.
+    Deadlines may come back from the DB as ISO strings (with or without 'Z') or as datetimes.
+    """
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def is_past_deadline(value: Union[str, datetime, None], now: Optional[datetime] = None) -> bool:
+    """
+    Returns True once the deadline has passed. Missing or unparsable deadlines count as open.
+    """
+    if not value:
+        return False
+    try:
+        deadline = parse_deadline(value)
+    except ValueError:
+        return False
+    return (now or datetime.utcnow()) >= deadline
@@ -0,0 +1,146 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+class RateLimitExceeded(Exception):
+    """Raised when a submission is refused; retry_after is in seconds."""
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class InMemoryRateLimitStore:
+    """
+    Process-local store for token buckets and daily counters.
+    Swap for a shared implementation (e.g. Redis) exposing the same methods
+    when running more than one worker.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._counters = {}
+        self._counter_day = None
+
+    def consume_token(self, key: str, capacity: float, refill_seconds: float, now: Optional[float] = None) -> float:
+        """
+        Takes one token from the bucket for key. Returns 0 if a token was available,
+        otherwise the number of seconds until the next token.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) / refill_seconds)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) * refill_seconds
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+    def peek_token(self, key: str, capacity: float, refill_seconds: float, now: Optional[float] = None) -> float:
+        """Like consume_token, but only reports the wait and leaves the bucket untouched."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) / refill_seconds)
+            return 0.0 if tokens >= 1 else (1 - tokens) * refill_seconds
+
+    def reserve(self, limits: dict, day: str) -> Optional[str]:
+        """
+        Atomically increments every counter in limits ({key: limit}) if all of them are
+        still below their limit. Returns None on success, otherwise the first key at its limit.
+        """
+        with self._lock:
+            # Counters only ever matter for the current day
+            if self._counter_day != day:
+                self._counters = {}
+                self._counter_day = day
+            for key, limit in limits.items():
+                if self._counters.get(key, 0) >= limit:
+                    return key
+            for key in limits:
+                self._counters[key] = self._counters.get(key, 0) + 1
+            return None
+
+    def release(self, keys, day: str):
+        """Gives back counters taken by reserve(), e.g. when the submission failed."""
+        with self._lock:
+            if self._counter_day != day:
+                return
+            for key in keys:
+                self._counters[key] = max(0, self._counters.get(key, 0) - 1)
+
+class SubmissionLimiter:
+    """
+    Admission control for POST /submissions/:
+    - token bucket per user (peeked before the upload body is read, consumed once the form is parsed)
+    - daily quotas per user and per user+competition, reserved up front and released if the submission fails
+    - global load shedding when too many submissions are being scored
+    """
+    def __init__(self, store=None):
+        self.store = store or InMemoryRateLimitStore()
+        self.burst = float(os.getenv("SUBMISSION_BURST", "3"))
+        self.refill_seconds = float(os.getenv("SUBMISSION_REFILL_SECONDS", "20"))
+        self.user_daily_quota = int(os.getenv("SUBMISSION_USER_DAILY_QUOTA", "50"))
+        self.competition_daily_quota = int(os.getenv("SUBMISSION_COMPETITION_DAILY_QUOTA", "10"))
+        self.max_scoring_backlog = int(os.getenv("MAX_SCORING_BACKLOG", "8"))
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def scoring_backlog(self) -> int:
+        return self._in_flight
+
+    def check_admission(self):
+        if self._in_flight >= self.max_scoring_backlog:
+            # Rough guess: the backlog drains at about one submission per second
+            raise RateLimitExceeded("Scoring is busy, please retry shortly.", self._in_flight - self.max_scoring_backlog + 1)
+
+    def check_rate(self, user_id: str):
+        wait = self.store.consume_token(f"rate:{user_id}", self.burst, self.refill_seconds)
+        if wait > 0:
+            raise RateLimitExceeded("Too many submissions, please slow down.", wait)
+
+    def peek_rate(self, user_id: str):
+        """Refuses early if user_id is out of tokens, without spending one."""
+        wait = self.store.peek_token(f"rate:{user_id}", self.burst, self.refill_seconds)
+        if wait > 0:
+            raise RateLimitExceeded("Too many submissions, please slow down.", wait)
+
+    def _quota_keys(self, user_id: str, competition_id: str) -> dict:
+        return {
+            f"user:{user_id}": self.user_daily_quota,
+            f"competition:{competition_id}:user:{user_id}": self.competition_daily_quota,
+        }
+
+    def reserve_quota(self, user_id: str, competition_id: str):
+        """Counts a submission against the daily quotas; call release_quota if it doesn't go through."""
+        now = datetime.utcnow()
+        day = now.strftime("%Y-%m-%d")
+        until_reset = (datetime(now.year, now.month, now.day) + timedelta(days=1) - now).total_seconds()
+
+        full = self.store.reserve(self._quota_keys(user_id, competition_id), day)
+        if full is not None and full.startswith("user:"):
+            raise RateLimitExceeded(f"Daily limit of {self.user_daily_quota} submissions reached.", until_reset)
+        if full is not None:
+            raise RateLimitExceeded(f"Daily limit of {self.competition_daily_quota} submissions for this competition reached.", until_reset)
+
+    def release_quota(self, user_id: str, competition_id: str):
+        day = datetime.utcnow().strftime("%Y-%m-%d")
+        self.store.release(self._quota_keys(user_id, competition_id), day)
+
+    @contextmanager
+    def scoring_slot(self):
+        """Counts a submission towards the scoring backlog while it is being scored."""
+        with self._in_flight_lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+
+submission_limiter = SubmissionLimiter()
@@ -0,0 +1,204 @@
+import asyncio
+import functools
+import gzip
+import itertools
+import os
+import time
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from app.utils.deadlines import parse_deadline
+
+# Deadlines further away than this don't make a job any more urgent
+DEADLINE_HORIZON_HOURS = 7 * 24
+
+def _size_and_sample(file_path: str, sample_bytes: int):
+    """Uncompressed size of a file and its first bytes; archives are looked into without extracting them."""
+    lower = file_path.lower()
+    try:
+        if lower.endswith(".zip"):
+            with zipfile.ZipFile(file_path) as zf:
+                members = [info for info in zf.infolist() if not info.is_dir()]
+                if members:
+                    with zf.open(members[0]) as f:
+                        return sum(info.file_size for info in members), f.read(sample_bytes)
+        elif lower.endswith((".tar.gz", ".tgz")):
+            # gzip keeps the uncompressed size (modulo 4 GiB) in its last 4 bytes
+            with open(file_path, "rb") as f:
+                f.seek(-4, os.SEEK_END)
+                size = int.from_bytes(f.read(4), "little")
+            with gzip.open(file_path) as f:
+                return max(size, os.path.getsize(file_path)), f.read(sample_bytes)
+    except (OSError, EOFError, zlib.error, zipfile.BadZipFile, NotImplementedError, RuntimeError):
+        # Broken, encrypted or unsupported archives are rejected by scoring anyway; price them by their size on disk
+        pass
+    with open(file_path, "rb") as f:
+        return os.path.getsize(file_path), f.read(sample_bytes)
+
+def estimate_cost(file_path: str, sample_bytes: int = 64 * 1024):
+    """
+    Cheap cost estimate for scoring a file: returns (size in bytes, estimated rows, cost in seconds).
+    Rows are extrapolated from the newline density of the first few KB.
+    Archives are priced by their uncompressed contents.
+    """
+    size, sample = _size_and_sample(file_path, sample_bytes)
+    rows = int(size * sample.count(b"\n") / len(sample)) if sample else 0
+    # Rough throughput of parsing + scoring: ~50 MB/s and ~1M rows/s
+    cost = size / 50e6 + rows / 1e6
+    return size, rows, cost
+
+def job_priority(cost: float, deadline, now: Optional[datetime] = None) -> float:
+    """
+    Lower runs sooner. Cheap jobs go first, and jobs get cheaper the closer their
+    competition is to its deadline (by up to 8x inside the last hours).
+    Past or missing deadlines get no urgency boost.
+    """
+    slack_hours = DEADLINE_HORIZON_HOURS
+    if deadline:
+        try:
+            remaining = (parse_deadline(deadline) - (now or datetime.utcnow())).total_seconds() / 3600
+            if remaining > 0:
+                slack_hours = min(remaining, DEADLINE_HORIZON_HOURS)
+        except ValueError:
+            pass
+    return cost * (1 + slack_hours / 24)
+
+class ScoringJob:
+    def __init__(self, seq: int, user_id: str, competition_id: str, fn, args, estimate: tuple, deadline):
+        self.id = seq
+        self.seq = seq
+        self.user_id = user_id
+        self.competition_id = competition_id
+        self.fn = fn
+        self.args = args
+        self.file_size, self.estimated_rows, self.cost = estimate
+        self.priority = job_priority(self.cost, deadline)
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.future = None
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "id": self.id,
+            "userId": self.user_id,
+            "competitionId": self.competition_id,
+            "fileSize": self.file_size,
+            "estimatedRows": self.estimated_rows,
+            "estimatedSeconds": round(self.cost, 3),
+            "priority": round(self.priority, 3),
+            "waitSeconds": round((self.started_at or now) - self.enqueued_at, 3),
+            "runSeconds": round(now - self.started_at, 3) if self.started_at else None,
+        }
+
+class ScoringScheduler:
+    """
+    Runs scoring jobs off the event loop with a global concurrency limit and a cap per competition.
+
+    Pending jobs are dispatched round-robin across users: every user has a round counter
+    that grows each time one of their jobs starts, and the next job always comes from a
+    user with the lowest count. Within a round the job with the lowest priority value
+    (see job_priority) goes first. Counters are kept for as long as the scheduler stays
+    busy, so a user who goes idle between jobs resumes where they left off instead of
+    tying with (and, being cheaper, overtaking) a large job that is still waiting. A user
+    that becomes active never starts below the lowest round of the active users, so they
+    can't bank turns while idle either. Counters are reset once nothing is pending or running.
+
+    All state is only touched from the event loop, so no locking is needed.
+    """
+    def __init__(self, max_concurrency: int, per_competition_cap: int):
+        self.max_concurrency = max_concurrency
+        self.per_competition_cap = per_competition_cap
+        self._seq = itertools.count(1)
+        self._pending = []
+        self._running = []
+        self._user_rounds = {}
+
+    async def run(self, fn, *args, user_id: str, competition_id: str, deadline, file_path: str):
+        """Queues fn(*args) and waits for its result."""
+        seq = next(self._seq)  # Taken first, so ties still go to whoever arrived first
+        loop = asyncio.get_running_loop()
+        # Estimating looks inside archives, so it stays off the event loop too
+        estimate = await loop.run_in_executor(None, estimate_cost, file_path)
+        job = ScoringJob(seq, user_id, competition_id, fn, args, estimate, deadline)
+        job.future = loop.create_future()
+
+        self._join_round(user_id)
+        self._pending.append(job)
+        self._dispatch()
+        return await job.future
+
+    def _join_round(self, user_id: str):
+        active_rounds = [self._user_rounds[job.user_id] for job in self._pending + self._running]
+        floor = min(active_rounds, default=0)
+        self._user_rounds[user_id] = max(self._user_rounds.get(user_id, 0), floor)
+
+    def _running_in(self, competition_id: str) -> int:
+        return sum(1 for job in self._running if job.competition_id == competition_id)
+
+    def _order_key(self, job: ScoringJob):
+        return (self._user_rounds[job.user_id], job.priority, job.seq)
+
+    def _next_job(self) -> Optional[ScoringJob]:
+        # Jobs whose caller went away are dropped instead of scored
+        self._pending = [job for job in self._pending if not job.future.cancelled()]
+        eligible = [job for job in self._pending if self._running_in(job.competition_id) < self.per_competition_cap]
+        return min(eligible, key=self._order_key, default=None)
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while len(self._running) < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                break
+            self._pending.remove(job)
+            self._running.append(job)
+            self._user_rounds[job.user_id] += 1
+            job.started_at = time.monotonic()
+
+            task = loop.run_in_executor(None, functools.partial(job.fn, *job.args))
+            task.add_done_callback(functools.partial(self._finish, job))
+        if not self._pending and not self._running:
+            # Idle: the busy period is over and everyone starts from scratch next time
+            self._user_rounds.clear()
+
+    def _finish(self, job: ScoringJob, task: asyncio.Future):
+        self._running.remove(job)
+        if not job.future.done():
+            if task.exception() is not None:
+                job.future.set_exception(task.exception())
+            else:
+                job.future.set_result(task.result())
+        self._dispatch()
+
+    def _projected_order(self) -> list:
+        """Pending jobs in the order they would start if no new jobs arrived and caps allowed."""
+        rounds = dict(self._user_rounds)
+        pending = list(self._pending)
+        order = []
+        while pending:
+            job = min(pending, key=lambda j: (rounds[j.user_id], j.priority, j.seq))
+            pending.remove(job)
+            rounds[job.user_id] += 1
+            order.append(job)
+        return order
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        running_by_competition = {}
+        for job in self._running:
+            running_by_competition[job.competition_id] = running_by_competition.get(job.competition_id, 0) + 1
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "perCompetitionCap": self.per_competition_cap,
+            "runningByCompetition": running_by_competition,
+            "userRounds": dict(self._user_rounds),
+            "running": [job.to_dict(now) for job in self._running],
+            "pending": [job.to_dict(now) for job in self._projected_order()],
+        }
+
+scoring_scheduler = ScoringScheduler(
+    max_concurrency=int(os.getenv("SCORING_CONCURRENCY", str(min(4, os.cpu_count() or 1)))),
+    per_competition_cap=int(os.getenv("SCORING_PER_COMPETITION_CAP", "2")),
+)
@@ -1,73 +1,319 @@
 import pandas as pd
-from sklearn.metrics import accuracy_score, mean_squared_error
+import numpy as np
+import hashlib
+import csv
+import io
 import os
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-def calculate_score(submission_path: str, solution_path: str, metric: str) -> float:
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Share of solution rows scored on the public leaderboard while the competition is running
+DEFAULT_PUBLIC_FRACTION = 0.3
+
+# Archive submissions: one CSV shard per video/sequence
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+MAX_ARCHIVE_MEMBERS = int(os.getenv("MAX_ARCHIVE_MEMBERS", "1000"))
+MAX_ARCHIVE_BYTES = int(os.getenv("MAX_ARCHIVE_BYTES", str(1024 ** 3))) # Uncompressed total
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Shared by all requests so concurrent archive submissions can't multiply the thread count
+_shard_pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix="shard-scoring")
+
+# Columns that identify rows in tracking data and are never scored
+NON_TARGET_COLUMNS = ['frame', 'player_id', 'team']
+
+def higher_is_better(metric: str) -> bool:
+    """ACCURACY is maximized, error metrics like MSE are minimized."""
+    return metric.upper() == "ACCURACY"
+
+def _normalize_column(name: str) -> str:
+    return name.strip().lower()
+
+def _read_header(source) -> list:
+    if isinstance(source, str):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            return next(csv.reader(f), [])
+    # In-memory buffer (e.g. an archive member): peek at the first line and rewind
+    source.seek(0)
+    first_line = source.readline().decode("utf-8-sig")
+    source.seek(0)
+    return next(csv.reader([first_line]), [])
+
+def _build_ids(df: pd.DataFrame, strategy: str, id_columns: list) -> pd.Series:
+    if strategy == "composite":
+        return df[id_columns[0]].astype(str) + '_' + df[id_columns[1]].astype(str)
+    if strategy in ("id", "first_column"):
+        return df[id_columns[0]]
+    return pd.Series(df.index, index=df.index)
+
+def _has_numeric_ids(schema: dict) -> bool:
+    return any(schema["dtypes"][c] != "str" for c in schema["idColumns"])
+
+def _canonical_ids(ids: pd.Series) -> pd.Series:
+    """
+    Numeric IDs are read as text (no float precision loss on big IDs), so the same number
+    can be spelled differently, e.g. '1' in the solution and '1.0' in a submission written by
+    pandas after a NaN. Strip redundant trailing zeros, also inside composite 'frame_player' IDs.
+    """
+    ids = ids.astype(str).str.replace(r"(\d)\.0+(?=_|$)", r"\1", regex=True)
+    return ids.str.replace(r"(\.\d*?[1-9])0+(?=_|$)", r"\1", regex=True)
+
+def infer_solution_schema(solution_path: str) -> dict:
+    """
+    Infers the scoring schema of a solution file: column names, dtypes, how rows are
+    identified and which columns are scored. Meant to be computed once per solution
+    and stored with the competition, so scoring never has to guess again.
+    """
+    solution_df = pd.read_csv(solution_path)
+    solution_df.columns = [_normalize_column(c) for c in solution_df.columns]
+    columns = list(solution_df.columns)
+    if not columns:
+        raise ValueError("Solution file has no columns.")
+
+    # --- ID Handling Logic ---
+    if 'id' in columns:
+        strategy, id_columns = "id", ['id']
+    # Fallback 1: Composite key 'frame' + 'player_id' (Specific to sports tracking)
+    elif 'frame' in columns and 'player_id' in columns:
+        strategy, id_columns = "composite", ['frame', 'player_id']
+    # Fallback 2: Use the first column as ID if it looks like an identifier (unique)
+    elif solution_df.iloc[:, 0].is_unique:
+        strategy, id_columns = "first_column", [columns[0]]
+    # Fallback 3: Use row index (Risky but necessary if no ID provided)
+    else:
+        strategy, id_columns = "row_index", []
+
+    if strategy != "row_index" and _build_ids(solution_df, strategy, id_columns).duplicated().any():
+        print("Warning: Duplicate IDs found in solution file. Falling back to row index.")
+        strategy, id_columns = "row_index", []
+
+    dtypes = {}
+    for c in columns:
+        if pd.api.types.is_integer_dtype(solution_df[c]):
+            dtypes[c] = "int64"
+        elif pd.api.types.is_float_dtype(solution_df[c]):
+            dtypes[c] = "float64"
+        else:
+            dtypes[c] = "str"
+
+    target_columns = [c for c in columns if c != 'id' and c not in id_columns and c not in NON_TARGET_COLUMNS]
+
+    return {
+        "columns": columns,
+        "dtypes": dtypes,
+        "idStrategy": strategy,
+        "idColumns": id_columns,
+        "targetColumns": target_columns,
+    }
+
+def _read_typed_csv(source, columns: list, dtypes: dict) -> pd.DataFrame:
+    """
+    Reads only the requested (normalized) columns of a CSV (path or buffer) with explicit dtypes.
+    Requested columns missing from the file are skipped.
+    """
+    header = _read_header(source)
+    if not header:
+        raise ValueError(f"{os.path.basename(source) if isinstance(source, str) else 'CSV file'} is empty.")
+
+    # Map normalized names back to the spelling used in this particular file
+    original_names = {}
+    for name in header:
+        original_names.setdefault(_normalize_column(name), name)
+
+    present = [c for c in dict.fromkeys(columns) if c in original_names]
+    df = pd.read_csv(
+        source,
+        usecols=[original_names[c] for c in present],
+        dtype={original_names[c]: dtypes[c] for c in present},
+        engine=CSV_ENGINE,
+    )
+    df.columns = [_normalize_column(c) for c in df.columns]
+    return df[present]
+
+def build_public_mask(solution_path: str, public_fraction: float = DEFAULT_PUBLIC_FRACTION) -> bytes:
+    """
+    Builds the public/private row partition for a solution file.
+    The partition is seeded from the solution file name, so it is deterministic and only
+    needs to be computed once per solution. Rows are in file order and packed into a bitmap
+    (1 = public, 0 = private).
+    """
+    n_rows = len(pd.read_csv(solution_path, usecols=[0]))
+
+    # The public board is never empty (it backs Submission.score); keep a private row too when there are two or more
+    n_public = int(round(n_rows * public_fraction))
+    if n_rows >= 1:
+        n_public = max(n_public, 1)
+    if n_rows >= 2:
+        n_public = min(n_public, n_rows - 1)
+
+    seed = int(hashlib.sha256(os.path.basename(solution_path).encode("utf-8")).hexdigest()[:16], 16)
+    rng = np.random.default_rng(seed)
+
+    is_public = np.zeros(n_rows, dtype=bool)
+    is_public[rng.permutation(n_rows)[:n_public]] = True
+    return np.packbits(is_public).tobytes()
+
+def unpack_public_mask(public_mask: bytes, n_rows: int) -> np.ndarray:
+    """
+    Expands a packed public-row bitmap back into a boolean array of length n_rows.
+    """
+    bits = np.unpackbits(np.frombuffer(public_mask, dtype=np.uint8), count=n_rows)
+    if len(bits) != n_rows:
+        raise ValueError("Public/private partition does not match the solution file.")
+    return bits.astype(bool)
+
+def _load_solution(solution_path: str, schema: dict, public_mask: Optional[bytes]):
+    """
+    Loads the solution's ID + target columns, indexed and sorted by ID.
+    Also returns the public-row flags aligned with that order (None without a partition).
+    """
+    id_col = 'id'
+    id_columns = schema["idColumns"]
+
+    # Only ID + target columns, with the solution's dtypes.
+    # IDs are compared as text so both files agree on them.
+    solution_dtypes = {**schema["dtypes"], **{c: "str" for c in id_columns}}
+    solution_df = _read_typed_csv(solution_path, id_columns + schema["targetColumns"], solution_dtypes)
+    solution_df[id_col] = _build_ids(solution_df, schema["idStrategy"], id_columns)
+    if _has_numeric_ids(schema):
+        solution_df[id_col] = _canonical_ids(solution_df[id_col])
+
+    # Remember which rows are public before the rows get re-ordered by ID
+    if public_mask is not None:
+        public_rows = pd.Series(unpack_public_mask(public_mask, len(solution_df)), index=solution_df[id_col].values)
+    else:
+        public_rows = None
+
+    solution_df = solution_df.set_index(id_col).sort_index()
+    is_public = public_rows.loc[solution_df.index].to_numpy() if public_rows is not None else None
+    return solution_df, is_public
+
+def _load_submission(source, schema: dict) -> pd.DataFrame:
+    """Loads a submission (path or in-memory buffer) indexed by ID, using the solution's schema."""
+    id_col = 'id'
+    strategy = schema["idStrategy"]
+    id_columns = schema["idColumns"]
+    dtypes = schema["dtypes"]
+
+    # Predictions are parsed as floats for numeric targets (e.g. 1.0 for an integer class)
+    submission_dtypes = {c: "float64" if dtypes[c] != "str" else "str" for c in schema["targetColumns"]}
+    submission_dtypes.update({c: "str" for c in [id_col] + id_columns})
+    submission_columns = [id_col] + id_columns + schema["targetColumns"]
+    if strategy == "first_column":
+        # Submissions may name their ID column differently; the first column is the fallback
+        submission_header = _read_header(source)
+        first_column = _normalize_column(submission_header[0]) if submission_header else id_col
+        submission_dtypes.setdefault(first_column, "str")
+        submission_columns.append(first_column)
+    submission_df = _read_typed_csv(source, submission_columns, submission_dtypes)
+
+    has_id_sub = id_col in submission_df.columns
+    if strategy == "row_index":
+        submission_df[id_col] = submission_df.index
+    elif has_id_sub:
+        pass
+    elif all(c in submission_df.columns for c in id_columns):
+        submission_df[id_col] = _build_ids(submission_df, strategy, id_columns)
+    elif strategy == "first_column":
+        # Just assume first column matches
+        submission_df[id_col] = submission_df[first_column]
+    else:
+        # If submission still doesn't have ID, try using its index
+        submission_df[id_col] = submission_df.index
+
+    if strategy != "row_index" and _has_numeric_ids(schema):
+        submission_df[id_col] = _canonical_ids(submission_df[id_col])
+
+    # If submission has duplicates, we can't score properly.
+    if submission_df[id_col].duplicated().any():
+         # Try to drop duplicates? Or raise error? Standard is error.
+         raise ValueError("Submission file contains duplicate IDs.")
+
+    return submission_df.set_index(id_col)
+
+def _target_columns(schema: dict, submission_df: pd.DataFrame) -> list:
+    # Score the solution's target columns that the submission provides
+    target_cols = [c for c in schema["targetColumns"] if c in submission_df.columns]
+    if not target_cols:
+         raise ValueError("Could not identify target columns for scoring.")
+    return target_cols
+
+def _is_continuous(y_true: pd.DataFrame) -> bool:
+    # Check if any value is a float with decimals
+    try:
+        if (y_true.dtypes == 'float').any() or (y_true.dtypes == 'float64').any():
+             # Check if they are actually integers disguised as floats (e.g. 1.0, 0.0)
+             return not (y_true % 1 == 0).all().all()
+    except (TypeError, ValueError):
+        pass
+    return False
+
+def _row_values(y_true: pd.DataFrame, y_pred: pd.DataFrame, metric: str, is_continuous: bool) -> np.ndarray:
+    """Per-row metric values; the metric itself is their mean."""
+    # Check for NaN in predictions
+    if y_pred.isnull().values.any():
+        raise ValueError("Submission contains NaN/missing values in target columns.")
+
+    if metric.upper() == "ACCURACY":
+        if is_continuous:
+             # If continuous, Accuracy is undefined. Fallback to something else or round?
+             # Let's assume they want "exact match" after rounding?
+             # Or maybe this IS a regression task and they chose the wrong metric.
+             # Let's try rounding to nearest integer for classification accuracy.
+             y_true = y_true.round().astype(int)
+             y_pred = y_pred.round().astype(int)
+        elif _is_continuous(y_pred):
+            # Same rule as sklearn's accuracy_score: integral labels can't be matched against
+            # continuous predictions (predictions like 1.0 are fine)
+            raise ValueError("Classification metrics can't handle a mix of integral labels and continuous predictions.")
+
+        # Element-wise accuracy: each row contributes its share of correct cells,
+        # so the mean over rows equals total correct cells / total cells.
+        return (y_true.to_numpy() == y_pred.to_numpy()).mean(axis=1)
+    elif metric.upper() == "MSE":
+        return ((y_true.to_numpy(dtype=float) - y_pred.to_numpy(dtype=float)) ** 2).mean(axis=1)
+    else:
+        raise ValueError(f"Unsupported metric: {metric}")
+
+def _reduce_scores(row_values: np.ndarray, is_public: Optional[np.ndarray]) -> dict:
+    """
+    'score' is the public leaderboard score: it only ever covers public rows, so it is safe to
+    show before the deadline. The private score is kept separately for the final leaderboard.
+    """
+    if is_public is None:
+        # No partition: every row counts for both boards
+        score = float(row_values.mean())
+        return {"score": score, "publicScore": score, "privateScore": score}
+
+    public_score = float(row_values[is_public].mean()) if is_public.any() else None
+    return {
+        "score": public_score,
+        "publicScore": public_score,
+        "privateScore": float(row_values[~is_public].mean()) if (~is_public).any() else None,
+    }
+
+def calculate_score(submission_path: str, solution_path: str, metric: str, public_mask: Optional[bytes] = None, schema: Optional[dict] = None) -> dict:
     """
     Calculates the score based on the submission and solution files.
+    Returns the public and private partial scores, both computed from the same per-row results
+    ('score' is the public one, see _reduce_scores).
+    Pass the competition's cached schema to skip re-inferring it from the solution file.
     """
     try:
-        # Load CSVs
-        submission_df = pd.read_csv(submission_path)
-        solution_df = pd.read_csv(solution_path)
-
-        # Standardize column names: lowercase and strip whitespace
-        submission_df.columns = [c.strip().lower() for c in submission_df.columns]
-        solution_df.columns = [c.strip().lower() for c in solution_df.columns]
-
-        # --- ID Handling Logic ---
-        id_col = 'id'
-        
-        # Check if 'id' column exists
-        has_id_sol = id_col in solution_df.columns
-        has_id_sub = id_col in submission_df.columns
-
-        if not has_id_sol:
-            # Fallback 1: Composite key 'frame' + 'player_id' (Specific to sports tracking)
-            if 'frame' in solution_df.columns and 'player_id' in solution_df.columns:
-                solution_df[id_col] = solution_df['frame'].astype(str) + '_' + solution_df['player_id'].astype(str)
-                # Apply same logic to submission if needed
-                if not has_id_sub and 'frame' in submission_df.columns and 'player_id' in submission_df.columns:
-                    submission_df[id_col] = submission_df['frame'].astype(str) + '_' + submission_df['player_id'].astype(str)
-            # Fallback 2: Use the first column as ID if it looks like an identifier (unique)
-            elif solution_df.iloc[:, 0].is_unique:
-                original_col_name = solution_df.columns[0]
-                solution_df[id_col] = solution_df.iloc[:, 0]
-                # Try to use same column name in submission
-                if not has_id_sub and original_col_name in submission_df.columns:
-                     submission_df[id_col] = submission_df[original_col_name]
-                elif not has_id_sub:
-                     # Just assume first column matches
-                     submission_df[id_col] = submission_df.iloc[:, 0]
-            # Fallback 3: Use row index (Risky but necessary if no ID provided)
-            else:
-                solution_df[id_col] = solution_df.index
-                if not has_id_sub:
-                    submission_df[id_col] = submission_df.index
-
-        # Re-check ID presence after fallbacks
-        if id_col not in solution_df.columns:
-             raise ValueError(f"Solution file missing 'id' column. Found: {list(solution_df.columns)}")
-        if id_col not in submission_df.columns:
-             # If submission still doesn't have ID, try using its index if solution used index
-             submission_df[id_col] = submission_df.index
-
-        # Ensure unique IDs
-        if solution_df[id_col].duplicated().any():
-             # If duplicate IDs found (even after fallback 1), try fallback 3 (index)
-             print("Warning: Duplicate IDs found in solution file. Falling back to row index.")
-             solution_df[id_col] = solution_df.index
-             submission_df[id_col] = submission_df.index
-
-        # If submission has duplicates, we can't score properly.
-        if submission_df[id_col].duplicated().any():
-             # Try to drop duplicates? Or raise error? Standard is error.
-             raise ValueError("Submission file contains duplicate IDs.")
-
-        # Align DataFrames by ID
-        # Set ID as index for easier alignment
-        solution_df = solution_df.set_index(id_col).sort_index()
-        submission_df = submission_df.set_index(id_col).sort_index()
+        if schema is None:
+            schema = infer_solution_schema(solution_path)
+
+        solution_df, is_public = _load_solution(solution_path, schema, public_mask)
+        submission_df = _load_submission(submission_path, schema)
 
         # Check for missing IDs in submission
         missing_ids = solution_df.index.difference(submission_df.index)
@@ -77,92 +323,126 @@ def calculate_score(submission_path: str, solution_path: str, metric: str) -> fl
         # Keep only relevant rows (intersection of IDs)
         submission_df = submission_df.loc[solution_df.index]
 
-        # Identify target columns (all non-index columns that are NOT part of the original composite key if we made one)
-        # We need to exclude 'frame', 'player_id' if they exist, as they are not targets.
-        exclude_cols = ['frame', 'player_id', 'id', 'team', 'field_x', 'field_y'] # Exclude known non-targets
-        # Actually, let's be smarter. In the solution file, columns that are NOT the ID are usually the targets.
-        # But if we synthesized the ID, we might have left the original columns.
-        
-        # Heuristic: Target columns are those present in solution_df that are NOT 'id', 'frame', 'player_id'
-        # UNLESS the competition explicitly defines targets (which we don't have here).
-        # Let's assume target is the LAST column if we can't decide, OR all other numeric columns?
-        
-        # BETTER: Use the intersection of columns between solution and submission (excluding ID/Frame/Player)
-        # Assuming the user submits ONLY ID + Targets.
-        
-        potential_targets = [c for c in solution_df.columns if c not in ['frame', 'player_id', 'team']]
-        
-        # If solution has many columns (e.g. metadata), we only want to score the ones that are also in submission.
-        target_cols = [c for c in potential_targets if c in submission_df.columns]
-        
-        if not target_cols:
-             # Fallback: Use all columns from submission (except ID)
-             target_cols = [c for c in submission_df.columns if c not in ['frame', 'player_id']]
-             
-        # Check if we still have targets
-        if not target_cols:
-             raise ValueError("Could not identify target columns for scoring.")
-
+        target_cols = _target_columns(schema, submission_df)
         y_true = solution_df[target_cols]
-        y_pred = submission_df[target_cols]
-        
-        # Check for NaN in predictions
-        if y_pred.isnull().values.any():
-            raise ValueError("Submission contains NaN/missing values in target columns.")
-            
-        # Ensure numeric types for scoring
-        try:
-            y_true = y_true.apply(pd.to_numeric)
-            y_pred = y_pred.apply(pd.to_numeric)
-        except:
-            pass # Maybe classification with strings?
-
-        if metric.upper() == "ACCURACY":
-            # sklearn accuracy_score does NOT support continuous-multioutput.
-            # If targets are floats, we might need a custom threshold or rounding.
-            # BUT usually Accuracy is for classification.
-            # If the user selected ACCURACY but provided regression data, we have a mismatch.
-            
-            # Check if targets are continuous (floats)
-            is_continuous = False
-            try:
-                # Check if any value is a float with decimals
-                if (y_true.dtypes == 'float').any() or (y_true.dtypes == 'float64').any():
-                     # Check if they are actually integers disguised as floats (e.g. 1.0, 0.0)
-                     if not (y_true % 1 == 0).all().all():
-                          is_continuous = True
-            except:
-                pass
-
-            if is_continuous:
-                 # If continuous, Accuracy is undefined. Fallback to something else or round?
-                 # Let's assume they want "exact match" after rounding?
-                 # Or maybe this IS a regression task and they chose the wrong metric.
-                 # Let's try rounding to nearest integer for classification accuracy.
-                 y_true = y_true.round().astype(int)
-                 y_pred = y_pred.round().astype(int)
-            
-            # Flatten arrays if multi-output (to handle multiclass-multioutput error)
-            # accuracy_score on 2D arrays computes subset accuracy (all columns must match for a row to be correct)
-            # If we want overall element-wise accuracy, we should flatten.
-            # But usually Kaggle competitions with multiple columns treat each row as a sample.
-            # "multiclass-multioutput is not supported" usually means sklearn can't handle the format.
-            # Let's try flattening if it's 2D and see if that fixes it (element-wise accuracy).
-            if len(y_true.shape) > 1 and y_true.shape[1] > 1:
-                # Option A: Subset accuracy (strict row matching) - supported by accuracy_score if format is right
-                # Option B: Element-wise accuracy (total correct cells / total cells)
-                # Let's go with Option B as it's more forgiving and avoids the error for mixed types.
-                y_true = y_true.values.flatten()
-                y_pred = y_pred.values.flatten()
-
-            return float(accuracy_score(y_true, y_pred))
-        elif metric.upper() == "MSE":
-            return float(mean_squared_error(y_true, y_pred))
-        else:
-            raise ValueError(f"Unsupported metric: {metric}")
+        is_continuous = metric.upper() == "ACCURACY" and _is_continuous(y_true)
+        row_values = _row_values(y_true, submission_df[target_cols], metric, is_continuous)
+        return _reduce_scores(row_values, is_public)
 
     except Exception as e:
         # Re-raise ValueError directly to preserve the message
         if isinstance(e, ValueError):
             raise e
         raise ValueError(f"Error calculating score: {str(e)}")
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _is_shard_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return base.lower().endswith(".csv") and not base.startswith(".") and "__MACOSX" not in name
+
+def _iter_archive_csvs(archive_path: str):
+    """
+    Yields (name, buffer) for each CSV member, read straight from the archive into memory
+    without extracting anything to disk. Tar archives are read as a stream.
+    """
+    count, total = 0, 0
+
+    def admit(name: str, size: int):
+        nonlocal count, total
+        count += 1
+        total += size
+        if count > MAX_ARCHIVE_MEMBERS:
+            raise ValueError(f"Archive contains more than {MAX_ARCHIVE_MEMBERS} CSV files.")
+        if total > MAX_ARCHIVE_BYTES:
+            raise ValueError(f"Archive is larger than {MAX_ARCHIVE_BYTES} bytes uncompressed.")
+
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not _is_shard_name(info.filename):
+                    continue
+                admit(info.filename, info.file_size)
+                with zf.open(info) as member:
+                    yield info.filename, io.BytesIO(member.read())
+    else:
+        with tarfile.open(archive_path, mode="r|*") as tf:
+            for info in tf:
+                if not info.isfile() or not _is_shard_name(info.name):
+                    continue
+                admit(info.name, info.size)
+                yield info.name, io.BytesIO(tf.extractfile(info).read())
+
+def calculate_archive_score(archive_path: str, solution_path: str, metric: str, public_mask: Optional[bytes] = None, schema: Optional[dict] = None) -> dict:
+    """
+    Scores a zip/tar submission made of CSV shards (e.g. one per video).
+    Shards are parsed and scored in parallel, each against the solution rows whose IDs it covers,
+    with only a bounded window of them held in memory.
+    The per-row results are then reduced exactly like a single-file submission, so every
+    row carries the same weight no matter how the shards are split.
+    """
+    try:
+        if schema is None:
+            schema = infer_solution_schema(solution_path)
+        if schema["idStrategy"] == "row_index":
+            raise ValueError("Archive submissions need an ID column to match shards to the solution.")
+
+        solution_df, is_public = _load_solution(solution_path, schema, public_mask)
+
+        continuous = {}
+        failed = threading.Event()
+
+        def score_shard(name, buffer):
+            # Parses one shard and scores it against the solution rows whose IDs it covers
+            # (unknown IDs are ignored); only the per-row values outlive the task
+            try:
+                submission_df = _load_submission(buffer, schema)
+                target_cols = _target_columns(schema, submission_df)
+                key = tuple(target_cols)
+                if key not in continuous:
+                    continuous[key] = metric.upper() == "ACCURACY" and _is_continuous(solution_df[target_cols])
+                ids = submission_df.index.intersection(solution_df.index)
+                values = _row_values(solution_df.loc[ids, target_cols], submission_df.loc[ids, target_cols], metric, continuous[key])
+                return key, pd.Series(values, index=ids)
+            except Exception as e:
+                failed.set()
+                raise ValueError(f"{name}: {e}")
+
+        # Members are read one after another (tar is a stream) and scored in parallel as they arrive.
+        # At most SCORING_WORKERS of them are in memory at once: reading the next member waits for a free slot.
+        window = threading.Semaphore(SCORING_WORKERS)
+        members = _iter_archive_csvs(archive_path)
+        futures = []
+        try:
+            while window.acquire() and not failed.is_set():
+                member = next(members, None)
+                if member is None:
+                    break
+                future = _shard_pool.submit(score_shard, *member)
+                future.add_done_callback(lambda _: window.release())
+                futures.append(future)
+                del member
+        finally:
+            members.close()
+        results = [f.result() for f in futures]
+        if not results:
+            raise ValueError("Archive does not contain any CSV files.")
+
+        # Shard results can only be combined if every shard predicts the same targets
+        if len({key for key, _ in results}) > 1:
+            raise ValueError("All files in the archive must contain the same target columns.")
+        row_values = pd.concat([values for _, values in results])
+
+        if row_values.index.duplicated().any():
+            raise ValueError("Several files in the archive contain predictions for the same IDs.")
+        missing_ids = solution_df.index.difference(row_values.index)
+        if not missing_ids.empty:
+             raise ValueError(f"Submission is missing predictions for {len(missing_ids)} IDs.")
+
+        return _reduce_scores(row_values.loc[solution_df.index].to_numpy(), is_public)
+
+    except Exception as e:
+        if isinstance(e, ValueError):
+            raise e
+        raise ValueError(f"Error calculating score: {str(e)}")
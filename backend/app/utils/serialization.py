@@ -0,0 +1,71 @@
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter, ValidationError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?(Z|[+-]\d{2}:\d{2})?")
+_UTC_SUFFIXES = ("Z", "+00:00", "-00:00")
+_datetime_adapter = TypeAdapter(datetime)
+
+def normalize_timestamp(value):
+    """
+    Emits a stored timestamp string exactly as Pydantic would serialize it as a datetime:
+    'T' separator, microseconds padded to 6 digits or dropped when zero, UTC offsets as 'Z'.
+    Common ISO forms are rewritten as strings; anything else goes through Pydantic itself.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        match = _TIMESTAMP.fullmatch(value)
+        if match:
+            date, time, fraction, offset = match.groups()
+            fraction = "." + fraction.ljust(6, "0") if fraction and fraction.strip("0") else ""
+            offset = "Z" if offset in _UTC_SUFFIXES else (offset or "")
+            return f"{date}T{time}{fraction}{offset}"
+    try:
+        return _datetime_adapter.dump_python(_datetime_adapter.validate_python(value), mode="json")
+    except ValidationError:
+        return value
+
+def rows_to_json(fields: Sequence[str], rows: Iterable[tuple], timestamp_fields: Sequence[str] = ()) -> bytes:
+    """Serializes column tuples (as returned by db.query(*columns)) to a JSON array of objects."""
+    timestamp_positions = [fields.index(f) for f in timestamp_fields]
+    items = []
+    for row in rows:
+        if timestamp_positions:
+            row = list(row)
+            for i in timestamp_positions:
+                row[i] = normalize_timestamp(row[i])
+        items.append(dict(zip(fields, row)))
+    return dumps(items)
+
+def etag_response(request: Request, body: bytes) -> Response:
+    """
+    Returns body as JSON with an ETag, or an empty 304 if the client already has it.
+    """
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,87 @@
+"""
+Compares the ORM + Pydantic path with the column-tuple fast path for GET /competitions/.
+
+Run from the backend directory:
+    python benchmarks/bench_list_serialization.py [rows]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.utils.serialization import rows_to_json
+
+# Formats timestamps show up in; the fast path has to emit each exactly like Pydantic does
+TIMESTAMP_FORMATS = [
+    "2030-01-01 00:00:00",
+    "2030-01-01T00:00:00Z",
+    "2030-01-01T00:00:00.000Z",
+    "2030-01-01T00:00:00.120Z",
+    "2030-01-01T00:00:00+00:00",
+    "2030-01-01T00:00:00+05:30",
+    "2030-01-01T00:00:00.123456",
+    "2030-01-01",
+]
+
+def seed(db, n_rows: int):
+    db.add_all([
+        models.Competition(
+            id=f"competition-{i}",
+            title=f"Competition {i}",
+            description="Predict player positions from broadcast footage.",
+            deadline=TIMESTAMP_FORMATS[i % len(TIMESTAMP_FORMATS)],
+            createdAt=TIMESTAMP_FORMATS[(i + 1) % len(TIMESTAMP_FORMATS)],
+            metric="MSE",
+            trainDataPath=f"uploads/train/{i}_train.csv",
+            solutionDataPath=f"uploads/solution/{i}_solution.csv",
+            publicFraction=0.3,
+        )
+        for i in range(n_rows)
+    ])
+    db.commit()
+
+def orm_path(db, n_rows: int) -> bytes:
+    # What response_model=list[schemas.Competition] does: validate ORM objects
+    # (parsing every timestamp string into a datetime), dump them, encode JSON
+    competitions = crud.get_competitions(db, limit=n_rows)
+    adapter = TypeAdapter(list[schemas.Competition])
+    content = adapter.dump_python(adapter.validate_python(competitions), mode="json")
+    return json.dumps(content).encode("utf-8")
+
+def fast_path(db, n_rows: int) -> bytes:
+    rows = crud.get_competition_rows(db, limit=n_rows)
+    return rows_to_json(crud.COMPETITION_LIST_FIELDS, rows, timestamp_fields=("deadline", "createdAt", "updatedAt"))
+
+def best_of(fn, *args, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, n_rows)
+
+    assert json.loads(orm_path(db, n_rows)) == json.loads(fast_path(db, n_rows))
+
+    orm = best_of(orm_path, db, n_rows)
+    fast = best_of(fast_path, db, n_rows)
+    print(f"rows={n_rows}")
+    print(f"orm + pydantic: {orm * 1000:8.1f} ms")
+    print(f"column tuples:  {fast * 1000:8.1f} ms  ({orm / fast:.1f}x)")
+
+if __name__ == "__main__":
+    main()
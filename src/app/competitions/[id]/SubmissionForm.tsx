@@ -27,6 +27,8 @@ export default function SubmissionForm({ competitionId, userId }: { competitionI
     try {
       const res = await fetch("/api/submissions", {
         method: "POST",
+        // Lets the API rate limit before the upload is read
+        headers: { "X-User-Id": userId },
         body: formData,
       });
 
@@ -49,11 +51,11 @@ export default function SubmissionForm({ competitionId, userId }: { competitionI
   return (
     <form onSubmit={handleSubmit} className="space-y-4">
       <div className="space-y-2">
-        <Label htmlFor="submission">Upload CSV</Label>
+        <Label htmlFor="submission">Upload CSV or archive of CSVs</Label>
         <Input 
           id="submission" 
           type="file" 
-          accept=".csv"
+          accept=".csv,.zip,.tar,.tar.gz,.tgz"
           onChange={(e) => setFile(e.target.files?.[0] || null)}
           required 
         />